@@ -0,0 +1,86 @@
+import hashlib, os, sqlite3, threading
+import faiss
+import numpy as np
+from app.embeddings import embed_query
+
+CACHE_PATH = "vector_store/answer_cache.sqlite"
+SIMILARITY_THRESHOLD = 0.95
+
+def _sha256(*parts):
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+class AnswerCache:
+    """Cache of generated answers, persisted next to the vector store.
+
+    Exact hits are keyed on sha256(namespace, context, question), where the
+    caller's namespace identifies the generation settings. On a miss the question
+    embedding is compared against previously answered questions; an answer is
+    reused when its question has cosine similarity >= threshold and it was
+    answered from the same retrieved context under the same namespace.
+
+    Each entry is one SQLite row holding the question vector together with its
+    answer, so the vectors and answers cannot drift apart. Every process keeps
+    an in-memory FAISS index over the rows and appends rows written by other
+    workers before each lookup. Methods block; call them off the event loop."""
+
+    def __init__(self, path=CACHE_PATH, threshold=SIMILARITY_THRESHOLD):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.threshold = threshold
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS answers "
+            "(id INTEGER PRIMARY KEY, key TEXT UNIQUE, context TEXT, vec BLOB, answer TEXT)"
+        )
+        self.index = None
+        self.entries = []
+        self.exact = {}
+        self.last_id = 0
+        with self.lock:
+            self._sync()
+
+    def _sync(self):
+        rows = self.db.execute(
+            "SELECT id, key, context, vec, answer FROM answers WHERE id > ? ORDER BY id",
+            (self.last_id,),
+        ).fetchall()
+        for row_id, key, context, vec, answer in rows:
+            vec = np.frombuffer(vec, dtype=np.float32).reshape(1, -1)
+            if self.index is None:
+                self.index = faiss.IndexFlatIP(vec.shape[1])
+            self.index.add(vec)
+            self.entries.append((context, answer))
+            self.exact[key] = answer
+            self.last_id = row_id
+
+    def get(self, context, question, namespace=""):
+        key = _sha256(namespace, context, question)
+        with self.lock:
+            self._sync()
+            answer = self.exact.get(key)
+            if answer is not None or self.index is None:
+                return answer
+
+        vec = embed_query(question).reshape(1, -1)
+        context_hash = _sha256(namespace, context)
+        with self.lock:
+            D,I = self.index.search(vec, 4)
+            for sim, i in zip(D[0], I[0]):
+                if i < 0 or sim < self.threshold:
+                    break
+                if self.entries[i][0] == context_hash:
+                    return self.entries[i][1]
+        return None
+
+    def put(self, context, question, answer, namespace=""):
+        vec = np.asarray(embed_query(question), dtype=np.float32)
+        with self.lock:
+            with self.db:
+                self.db.execute(
+                    "INSERT OR IGNORE INTO answers (key, context, vec, answer) VALUES (?,?,?,?)",
+                    (_sha256(namespace, context, question), _sha256(namespace, context),
+                     vec.tobytes(), answer),
+                )
+            self._sync()
+
+answer_cache = AnswerCache()
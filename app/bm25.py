@@ -0,0 +1,88 @@
+import json, os, re
+from array import array
+from collections import Counter
+import numpy as np
+from scipy import sparse
+from app.storage import atomic_path
+
+TOKEN_RE = re.compile(r"\b\w+\b")
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+class BM25:
+    """Okapi BM25 with every (doc, term) weight precomputed into a sparse
+    terms x docs CSR matrix (one posting row per term), so scoring a query is
+    one sparse product that only reads the postings of its terms."""
+
+    def __init__(self, weights, vocab):
+        self.weights = weights
+        self.vocab = vocab
+
+    @classmethod
+    def from_corpus(cls, corpus, k1=1.5, b=0.75):
+        # CSR arrays grow per document in typed buffers: memory is ~8 bytes
+        # per distinct (doc, term) pair, not a Python int per token occurrence
+        vocab = {}
+        indptr, indices, counts = array("q", [0]), array("i"), array("f")
+        for text in corpus:
+            tf = Counter(vocab.setdefault(tok, len(vocab)) for tok in tokenize(text))
+            indices.extend(tf.keys())
+            counts.extend(tf.values())
+            indptr.append(len(indices))
+        n_docs = len(indptr) - 1
+
+        tf = sparse.csr_matrix(
+            (np.frombuffer(counts, dtype=np.float32),
+             np.frombuffer(indices, dtype=np.int32),
+             np.frombuffer(indptr, dtype=np.int64)),
+            shape=(n_docs, len(vocab)),
+        )
+
+        doc_len = np.asarray(tf.sum(axis=1), dtype=np.float32).ravel()
+        avgdl = doc_len.mean() if n_docs else 1.0
+        df = np.bincount(tf.indices, minlength=len(vocab))
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        norm = np.repeat(k1 * (1 - b + b * doc_len / (avgdl or 1.0)), np.diff(tf.indptr))
+        tf.data = idf[tf.indices] * tf.data * (k1 + 1) / (tf.data + norm)
+        return cls(tf.T.tocsr(), vocab)
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for name in ("data", "indices", "indptr"):
+            with atomic_path(os.path.join(path, f"bm25_{name}.npy")) as tmp, open(tmp, "wb") as f:
+                np.save(f, getattr(self.weights, name))
+        with atomic_path(os.path.join(path, "bm25_vocab.json")) as tmp, open(tmp, "w") as f:
+            json.dump({"shape": self.weights.shape, "vocab": self.vocab}, f)
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        """Load a saved index. The matrix arrays are memory-mapped, so
+        processes serving the same index share their pages."""
+        meta = json.load(open(os.path.join(path, "bm25_vocab.json")))
+        data, indices, indptr = (
+            np.load(os.path.join(path, f"bm25_{name}.npy"), mmap_mode=mmap_mode)
+            for name in ("data", "indices", "indptr")
+        )
+        weights = sparse.csr_matrix((data, indices, indptr), shape=tuple(meta["shape"]), copy=False)
+        return cls(weights, meta["vocab"])
+
+    def query_matrix(self, queries):
+        rows, cols = [], []
+        for q, text in enumerate(queries):
+            for tok in tokenize(text):
+                t = self.vocab.get(tok)
+                if t is not None:
+                    rows.append(q)
+                    cols.append(t)
+        return sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(queries), self.weights.shape[0]),
+        )
+
+    def get_batch_scores(self, queries):
+        return (self.query_matrix(queries) @ self.weights).toarray()
+
+    def get_scores(self, query):
+        return self.get_batch_scores([query])[0]
@@ -0,0 +1,84 @@
+import json, os
+import numpy as np
+from app.chunker import chunk_offsets
+
+TEXTS_FILE = "chunk_texts.bin"
+META_FILE = "chunk_meta.npy"
+OFFSETS_FILE = "chunk_offsets.npy"
+DOCS_FILE = "docs.json"
+
+class ChunkStoreWriter:
+    """Columnar chunk store written during ingestion.
+
+    Page text is appended once to a UTF-8 blob; each chunk is a (start, end)
+    byte range into it, so overlapping chunks share storage. (doc, page) per
+    chunk go into a small int32 array and doc names into a JSON list."""
+
+    def __init__(self, path):
+        # ingest writes into an unpublished generation directory, so the
+        # files can be written in place; nothing reads them until it is done
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.texts = open(os.path.join(path, TEXTS_FILE), "wb")
+        self.pos = 0
+        self.docs = {}
+        self.meta = []
+        self.offsets = []
+
+    def add_page(self, doc, page, text):
+        """Store a page and return its chunks as (chunk_id, text) pairs."""
+        doc_id = self.docs.setdefault(doc, len(self.docs))
+        chunks = []
+        prev, prev_byte = 0, self.pos
+        for s, e in chunk_offsets(len(text)):
+            prev_byte += len(text[prev:s].encode("utf-8"))
+            prev = s
+            chunk = text[s:e]
+            chunks.append((len(self.meta), chunk))
+            self.meta.append((doc_id, page))
+            self.offsets.append((prev_byte, prev_byte + len(chunk.encode("utf-8"))))
+        data = text.encode("utf-8")
+        self.texts.write(data)
+        self.pos += len(data)
+        return chunks
+
+    def close(self):
+        self.texts.close()
+        arrays = {
+            META_FILE: np.array(self.meta, dtype=np.int32).reshape(-1, 2),
+            OFFSETS_FILE: np.array(self.offsets, dtype=np.int64).reshape(-1, 2),
+        }
+        for name, arr in arrays.items():
+            np.save(os.path.join(self.path, name), arr)
+        with open(os.path.join(self.path, DOCS_FILE), "w") as f:
+            json.dump(list(self.docs), f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if exc[0] is None:
+            self.close()
+        else:
+            self.texts.close()
+
+class ChunkStore:
+    """Read side of ChunkStoreWriter. Arrays and text are memory-mapped, so
+    opening is O(1) and only the chunks actually returned get decoded."""
+
+    def __init__(self, path):
+        self.docs = json.load(open(os.path.join(path, DOCS_FILE)))
+        self.meta = np.load(os.path.join(path, META_FILE), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, OFFSETS_FILE), mmap_mode="r")
+        self.texts = np.memmap(os.path.join(path, TEXTS_FILE), dtype=np.uint8, mode="r")
+
+    def __len__(self):
+        return len(self.meta)
+
+    def text(self, i):
+        start, end = self.offsets[i]
+        return self.texts[start:end].tobytes().decode("utf-8")
+
+    def __getitem__(self, i):
+        doc_id, page = self.meta[i]
+        return {"chunk_id":int(i),"doc":self.docs[doc_id],"page":int(page),"text":self.text(i)}
@@ -1,7 +1,5 @@
+def chunk_offsets(length, size=500, overlap=50):
+    return [(s, min(s + size, length)) for s in range(0, length, size - overlap)]
+
 def chunk_text(text, size=500, overlap=50):
-    chunks = []
-    start = 0
-    while start < len(text):
-        chunks.append(text[start:start+size])
-        start += size - overlap
-    return chunks
+    return [text[s:e] for s, e in chunk_offsets(len(text), size, overlap)]
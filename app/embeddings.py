@@ -1,6 +1,79 @@
+import hashlib, os, sqlite3, threading
+from functools import lru_cache
+
+import numpy as np
 from sentence_transformers import SentenceTransformer
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+MODEL_NAME = "all-MiniLM-L6-v2"
+QUERY_CACHE_PATH = "vector_store/query_cache.db"
+CACHE_DTYPE = np.float16
+
+model = SentenceTransformer(MODEL_NAME)
 
 def embed(texts):
-    return model.encode(texts)
+    # unit-length vectors, so inner product == cosine similarity
+    return model.encode(texts, normalize_embeddings=True)
+
+def text_key(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class EmbeddingCache:
+    """On-disk sha256(text) -> vector store, namespaced by embedding model.
+    Vectors are kept as float16; callers get float32 back."""
+
+    def __init__(self, path, namespace=MODEL_NAME):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.namespace = namespace
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(namespace TEXT, key TEXT, vec BLOB, PRIMARY KEY (namespace, key))"
+        )
+
+    def get(self, keys):
+        found = {}
+        keys = list(set(keys))
+        with self.lock:
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i+500]
+                rows = self.db.execute(
+                    "SELECT key, vec FROM embeddings WHERE namespace=? AND key IN (%s)"
+                    % ",".join("?" * len(batch)),
+                    [self.namespace, *batch],
+                ).fetchall()
+                for key, vec in rows:
+                    found[key] = np.frombuffer(vec, dtype=CACHE_DTYPE).astype(np.float32)
+        return found
+
+    def put(self, items):
+        with self.lock, self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?,?,?)",
+                [(self.namespace, k, np.asarray(v, dtype=CACHE_DTYPE).tobytes()) for k, v in items],
+            )
+
+def embed_cached(texts, cache):
+    """Embed texts, only running the model on ones missing from cache."""
+    keys = [text_key(t) for t in texts]
+    found = cache.get(keys)
+    missing = {k: t for k, t in zip(keys, texts) if k not in found}
+    if missing:
+        vecs = embed(list(missing.values()))
+        new = list(zip(missing.keys(), vecs))
+        cache.put(new)
+        # round-trip through the cache dtype so hits and misses agree exactly
+        found.update((k, v.astype(CACHE_DTYPE).astype(np.float32)) for k, v in new)
+    return np.stack([found[k] for k in keys]).astype(np.float32, copy=False)
+
+query_cache = EmbeddingCache(QUERY_CACHE_PATH)
+
+@lru_cache(maxsize=4096)
+def embed_query(query):
+    vec = embed_cached([query], query_cache)[0]
+    vec.flags.writeable = False  # shared between callers via the LRU
+    return vec
+
+def embed_queries(queries):
+    """Batch variant of embed_query: one model call for all uncached queries."""
+    return embed_cached(queries, query_cache)
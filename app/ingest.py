@@ -1,34 +1,74 @@
-import os, json, faiss
-from pypdf import PdfReader
-from app.chunker import chunk_text
-from app.embeddings import embed
+import os
+import multiprocessing
+import numpy as np
+from usearch.index import Index
+from app.bm25 import BM25
+from app.chunk_store import ChunkStore, ChunkStoreWriter
+from app.pdf_extract import extract_range, page_tasks
+from app.storage import new_generation
 
 DATA_PATH = "data"
 VECTOR_PATH = "vector_store"
+INDEX_FILE = "index.usearch"
+EMBED_CACHE_PATH = "vector_store/emb_cache.sqlite"
 
-def ingest():
-    texts, metadata = [], []
+EMBED_BATCH = 256
 
-    for file in os.listdir(DATA_PATH):
-        if not file.lower().endswith(".pdf"):
-            continue
-        reader = PdfReader(os.path.join(DATA_PATH, file))
-        for i, page in enumerate(reader.pages):
-            page_text = page.extract_text()
-            chunks = chunk_text(page_text)
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 200
 
-            for chunk in chunks:
-                texts.append(chunk)
-                metadata.append({"doc":file,"page":i,"text":chunk})
+def iter_chunks(pool, workers, store):
+    """Yield (chunk_id, text) in document order as worker pages come back.
+    Each page is written to the chunk store as it arrives; chunk_id is the
+    chunk's row there and its key in the vector index."""
+    for pages in pool.imap(extract_range, page_tasks(DATA_PATH, workers)):
+        for file, i, page_text in pages:
+            yield from store.add_page(file, i, page_text)
 
-    vectors = embed(texts)
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
-    index = faiss.IndexFlatL2(len(vectors[0]))
-    index.add(vectors)
+def ingest():
+    # imported here, not at module level: spawned workers re-import this
+    # module when it is run as a script, and must not load the model
+    from app.embeddings import EmbeddingCache, embed_cached
 
     os.makedirs(VECTOR_PATH, exist_ok=True)
-    faiss.write_index(index,"vector_store/index.faiss")
-    json.dump(metadata,open("vector_store/metadata.json","w"))
+    index = None
+    # chunks seen by an earlier run keep their vectors; only new text is embedded
+    cache = EmbeddingCache(EMBED_CACHE_PATH)
+
+    # spawn, not fork: /ingest runs inside a threaded server process holding
+    # torch state and an open SQLite connection
+    ctx = multiprocessing.get_context("spawn")
+    workers = ctx.cpu_count()
+    # everything is written into a fresh generation directory that goes live
+    # in one rename, so readers never pair chunks, vectors and BM25 from
+    # different runs; a failure deletes it and leaves the old store serving
+    with new_generation(VECTOR_PATH) as gen:
+        with ctx.Pool(workers) as p, ChunkStoreWriter(gen) as store:
+            for batch in _batches(iter_chunks(p, workers, store), EMBED_BATCH):
+                ids, texts = zip(*batch)
+                vectors = embed_cached(list(texts), cache)
+                if index is None:
+                    # i8 codes scale unit-vector components directly, so the index
+                    # needs no training pass and can be filled batch by batch
+                    index = Index(ndim=vectors.shape[1], metric="cos", dtype="i8",
+                                  connectivity=HNSW_M, expansion_add=HNSW_EF_CONSTRUCTION)
+                index.add(np.array(ids), vectors)
+
+        if index is None:
+            raise ValueError(f"no text extracted from PDFs in {DATA_PATH}/")
+        index.save(os.path.join(gen, INDEX_FILE))
+        store = ChunkStore(gen)
+        BM25.from_corpus(store.text(i) for i in range(len(store))).save(gen)
 
 if __name__=="__main__":
     ingest()
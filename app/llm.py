@@ -1,34 +1,64 @@
-import os
-from anthropic import Anthropic
+import asyncio, json, os
+from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
 from dotenv import load_dotenv
+from app.answer_cache import answer_cache
 
 load_dotenv()
 
-client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+# the SDK's default client already keeps a connection pool; HTTP/2 lets the
+# concurrent calls from /ask_batch share connections instead of opening more
+client = AsyncAnthropic(
+    api_key=os.getenv("ANTHROPIC_API_KEY"),
+    http_client=DefaultAsyncHttpxClient(http2=True),
+)
 
 REFUSAL = "This information is not available in the provided document(s)."
 
-def generate(context, question):
+MODEL = "claude-3-haiku-20240307"
+TEMPERATURE = 0
+MAX_TOKENS = 300
+# short-answer question types don't need the full decode budget
+MAX_TOKENS_BY_TYPE = {"factual": 150}
+STOP_SEQUENCES = ["\n\nQuestion:", "\n\n---"]
+# bump when the message layout in generate() changes, to retire cached answers
+PROMPT_VERSION = 1
 
-    if not context.strip():
-        return REFUSAL
-
-    prompt=f"""
-Answer ONLY using provided context.
+INSTRUCTIONS = f"""Answer ONLY using provided context.
 If not found return EXACT:
-{REFUSAL}
+{REFUSAL}"""
+
+def _cache_namespace(qtype, max_tokens):
+    # an answer is only reusable under the settings that produced it
+    return json.dumps([PROMPT_VERSION, MODEL, INSTRUCTIONS, TEMPERATURE, STOP_SEQUENCES, max_tokens, qtype])
 
-Context:
-{context}
+async def generate(context, question, qtype=None):
+
+    if not context.strip():
+        return REFUSAL
 
-Question:
-{question}
-"""
+    max_tokens = MAX_TOKENS_BY_TYPE.get(qtype, MAX_TOKENS)
+    namespace = _cache_namespace(qtype, max_tokens)
+    # the cache does SQLite I/O and may embed the question; keep it off the loop
+    cached = await asyncio.to_thread(answer_cache.get, context, question, namespace)
+    if cached is not None:
+        return cached
 
-    msg=client.messages.create(
-        model="claude-3-haiku-20240307",
-        max_tokens=300,
-        messages=[{"role":"user","content":prompt}]
+    msg=await client.messages.create(
+        model=MODEL,
+        max_tokens=max_tokens,
+        temperature=TEMPERATURE,
+        stop_sequences=STOP_SEQUENCES,
+        system=[{"type":"text","text":INSTRUCTIONS,"cache_control":{"type":"ephemeral"}}],
+        messages=[{"role":"user","content":[
+            # context goes first, with its own breakpoint, so questions that
+            # retrieve the same chunks share the cached prefix
+            {"type":"text","text":f"Context:\n{context}","cache_control":{"type":"ephemeral"}},
+            {"type":"text","text":f"Question:\n{question}"},
+        ]}]
     )
 
-    return msg.content[0].text
+    # a stop sequence can end the reply before any text block is produced
+    answer = "".join(b.text for b in msg.content if b.type == "text")
+    if answer:
+        await asyncio.to_thread(answer_cache.put, context, question, answer, namespace)
+    return answer
@@ -1,13 +1,16 @@
+from typing import List, Optional
 from fastapi import FastAPI
 from pydantic import BaseModel
+from app import retriever
 from app.ingest import ingest
-from app.rag_pipeline import ask_question
+from app.rag_pipeline import ask_question, ask_questions
 
 app=FastAPI()
 
 class Query(BaseModel):
     question:str
     debug:bool=False
+    type:Optional[str]=None
 
 @app.get("/health")
 def health():
@@ -16,8 +19,13 @@ def health():
 @app.post("/ingest")
 def run_ingest():
     ingest()
+    retriever.reload()
     return {"status":"ingested"}
 
 @app.post("/ask")
-def ask(q:Query):
-    return ask_question(q.question,q.debug)
+async def ask(q:Query):
+    return await ask_question(q.question,q.debug,q.type)
+
+@app.post("/ask_batch")
+async def ask_batch(qs:List[Query]):
+    return await ask_questions([q.question for q in qs],[q.debug for q in qs],[q.type for q in qs])
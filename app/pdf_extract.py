@@ -0,0 +1,37 @@
+"""PDF text extraction run inside ingest worker processes.
+
+Kept free of model and cache imports: spawned workers import this module,
+and should not load the embedding model just to run pypdf."""
+
+import os
+from functools import lru_cache
+from pypdf import PdfReader
+
+# a file is split across at most one worker per this many bytes, so small
+# PDFs are parsed by a single worker instead of once per worker
+SPLIT_BYTES = 1 << 20
+
+@lru_cache(maxsize=1)
+def _open_pdf(path):
+    # a worker's parts of one file arrive back to back, so only the PDF it is
+    # working on needs to stay parsed
+    return PdfReader(path)
+
+def extract_range(args):
+    # PdfReader isn't picklable, so every worker opens its own. The page
+    # count is only known once the file is parsed, so the task names a part
+    # and the worker turns it into a contiguous page range.
+    data_path, file, part, parts = args
+    reader = _open_pdf(os.path.join(data_path, file))
+    n = len(reader.pages)
+    start, stop = n * part // parts, n * (part + 1) // parts
+    return [(file, i, reader.pages[i].extract_text()) for i in range(start, stop)]
+
+def page_tasks(data_path, workers):
+    files = sorted(f for f in os.listdir(data_path) if f.lower().endswith(".pdf"))
+    tasks = []
+    for file in files:
+        size = os.path.getsize(os.path.join(data_path, file))
+        parts = max(1, min(workers, size // SPLIT_BYTES))
+        tasks += [(data_path, file, part, parts) for part in range(parts)]
+    return tasks
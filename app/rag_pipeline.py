@@ -1,12 +1,12 @@
-from app.retriever import retrieve
+import asyncio
+from app.retriever import retrieve, retrieve_batch
 from app.llm import generate,REFUSAL
 
-def ask_question(q,debug=False):
+async def _answer(q,chunks,debug,qtype=None):
 
-    chunks=retrieve(q)
     context="\n".join([c["text"] for c in chunks])
 
-    answer=generate(context,q)
+    answer=await generate(context,q,qtype)
 
     citations=[f'{c["doc"]} page {c["page"]+1}' for c in chunks]
 
@@ -15,3 +15,16 @@ def ask_question(q,debug=False):
         "citations":citations,
         "chunks":chunks if debug else []
     }
+
+# retrieval runs the local embedding model, so it goes to a worker thread
+# to keep the event loop free while LLM calls are in flight
+
+async def ask_question(q,debug=False,qtype=None):
+    chunks=await asyncio.to_thread(retrieve,q)
+    return await _answer(q,chunks,debug,qtype)
+
+async def ask_questions(qs,debug=None,qtypes=None):
+    debug=debug or [False]*len(qs)
+    qtypes=qtypes or [None]*len(qs)
+    batch=await asyncio.to_thread(retrieve_batch,qs)
+    return await asyncio.gather(*[_answer(q,chunks,d,t) for q,chunks,d,t in zip(qs,batch,debug,qtypes)])
@@ -1,33 +1,107 @@
-import json, faiss
-from rank_bm25 import BM25Okapi
-from app.embeddings import embed
-
-index = faiss.read_index("vector_store/index.faiss")
-metadata = json.load(open("vector_store/metadata.json"))
-
-corpus = [m["text"] for m in metadata]
-bm25 = BM25Okapi([c.split() for c in corpus])
-
-def retrieve(query, k=3):
-    vec = embed([query])
-    D,I = index.search(vec,k)
-
-    vector_chunks = [metadata[i] for i in I[0]]
-
-    bm25_scores = bm25.get_scores(query.split())
-    bm25_top = sorted(range(len(bm25_scores)),
-                      key=lambda i:bm25_scores[i],
-                      reverse=True)[:k]
-
-    bm25_chunks = [metadata[i] for i in bm25_top]
-
-    seen = set()
-    combined = []
-    for c in vector_chunks + bm25_chunks:
-        key = (c.get("doc"), c.get("page"), c.get("text", "")[:50])
-        if key not in seen:
-            seen.add(key)
-            combined.append(c)
-        if len(combined) >= k:
-            break
-    return combined[:k]
+import os, threading
+from types import SimpleNamespace
+import faiss
+import numpy as np
+from usearch.index import Index
+from app.bm25 import BM25
+from app.chunk_store import ChunkStore
+from app.embeddings import embed_query, embed_queries
+from app.storage import current_generation
+
+VECTOR_PATH = "vector_store"
+HNSW_EF_SEARCH = 64
+GPU_MIN_VECTORS = 50_000
+
+def _to_gpu(cpu_index):
+    # exact fp16 flat scan on the GPU; past GPU_MIN_VECTORS it outruns the
+    # CPU graph search
+    res = faiss.StandardGpuResources()
+    cfg = faiss.GpuIndexFlatConfig()
+    cfg.useFloat16 = True
+    gpu_index = faiss.GpuIndexFlatIP(res, cpu_index.ndim, cfg)
+    gpu_index.add(np.stack(cpu_index.get(np.arange(len(cpu_index)), dtype=np.float32)))
+    gpu_index.referenced_objects = [res]
+    return gpu_index
+
+def load(path=VECTOR_PATH):
+    gen = current_generation(path)
+    # view=True memory-maps the file instead of loading every vector into RAM
+    index = Index.restore(os.path.join(gen, "index.usearch"), view=True)
+    index.expansion_search = HNSW_EF_SEARCH
+    gpu_index = None
+    if faiss.get_num_gpus() > 0 and len(index) > GPU_MIN_VECTORS:
+        gpu_index = _to_gpu(index)
+    # FAISS GPU indexes and their StandardGpuResources are not thread-safe,
+    # and queries reach _search from several asyncio.to_thread workers
+    return SimpleNamespace(generation=gen, index=index, gpu_index=gpu_index,
+                           gpu_lock=threading.Lock(),
+                           chunks=ChunkStore(gen), bm25=BM25.load(gen))
+
+store = load()
+_reload_lock = threading.Lock()
+
+def reload():
+    """Pick up a fresh ingest. In-flight queries finish on the store they
+    started with; its generation directory stays mapped until they drop it."""
+    global store
+    with _reload_lock:
+        store = load()
+
+def current():
+    """The store a new request should use. /ingest runs in one uvicorn
+    worker, so every worker compares the published generation here and
+    reloads when it has moved on."""
+    global store
+    if current_generation(VECTOR_PATH) != store.generation:
+        with _reload_lock:
+            if current_generation(VECTOR_PATH) != store.generation:
+                store = load()
+    return store
+
+def top_k(scores, k):
+    """Indices of the k highest scores, best first, without a full sort."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx])]
+
+def _search(s, vecs, k):
+    """(n, k) chunk ids for n query vectors, -1 past the last hit."""
+    if s.gpu_index is not None:
+        with s.gpu_lock:
+            return s.gpu_index.search(vecs, k)[1]
+    matches = s.index.search(vecs, k)
+    ids = np.full((len(vecs), k), -1, dtype=np.int64)
+    if len(vecs) == 1:
+        ids[0, :len(matches.keys)] = matches.keys[:k]
+    else:
+        found = np.arange(k) < matches.counts[:, None]
+        ids[found] = matches.keys[found]
+    return ids
+
+def _merge(s, vector_ids, bm25_ids, k):
+    # vector hits first, then BM25; keep each chunk id at its first position
+    candidates = np.concatenate([vector_ids, bm25_ids])
+    candidates = candidates[candidates >= 0]
+    _, first = np.unique(candidates, return_index=True)
+    return [s.chunks[i] for i in candidates[np.sort(first)][:k]]
+
+def retrieve_batch(queries, k=3, vecs=None):
+    """retrieve() for many queries: one embed call, one vector search and one
+    sparse BM25 product for the whole batch."""
+    if not queries:
+        return []
+    if vecs is None:
+        vecs = embed_queries(queries)
+    vecs = np.ascontiguousarray(np.reshape(vecs, (len(queries), -1)), dtype=np.float32)
+    s = current()
+    I = _search(s, vecs, k)
+
+    bm25_scores = s.bm25.get_batch_scores(queries)
+    return [_merge(s, I[q], top_k(bm25_scores[q], k), k) for q in range(len(queries))]
+
+def retrieve(query, k=3, vec=None):
+    if vec is None:
+        vec = embed_query(query)
+    return retrieve_batch([query], k, vec.reshape(1, -1))[0]
@@ -0,0 +1,60 @@
+import os, shutil, tempfile, time
+from contextlib import contextmanager
+
+CURRENT_FILE = "CURRENT"
+GENERATION_PREFIX = "gen-"
+
+@contextmanager
+def atomic_path(path):
+    """Yield a temporary path next to `path`, then os.replace it into place.
+
+    The API memory-maps the vector store. Replacing rather than rewriting a
+    file leaves those mappings on the old inode instead of truncating pages
+    under a running reader (SIGBUS). The temp name is unique per call, so
+    overlapping writers in one process never share a partial file."""
+    directory, name = os.path.split(path)
+    fd, tmp = tempfile.mkstemp(dir=directory or ".", prefix=f".{name}.", suffix=".tmp")
+    os.close(fd)
+    os.chmod(tmp, 0o644)
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def current_generation(path):
+    """Directory holding the published store under `path`. Stores written
+    before generations existed live in `path` itself."""
+    try:
+        with open(os.path.join(path, CURRENT_FILE)) as f:
+            return os.path.join(path, f.read().strip())
+    except FileNotFoundError:
+        return path
+
+@contextmanager
+def new_generation(path):
+    """Yield an empty directory to write a complete store into, then publish
+    it by replacing the CURRENT pointer in one rename.
+
+    Readers resolve CURRENT once per load, so they see the old generation
+    or the new one and never a mix of files from both. If the block raises,
+    the directory is deleted and the published store is left as it was."""
+    building = tempfile.mkdtemp(dir=path, prefix=".building-")
+    try:
+        yield building
+    except BaseException:
+        shutil.rmtree(building, ignore_errors=True)
+        raise
+    previous = os.path.basename(current_generation(path))
+    name = f"{GENERATION_PREFIX}{time.time_ns()}"
+    os.rename(building, os.path.join(path, name))
+    with atomic_path(os.path.join(path, CURRENT_FILE)) as tmp, open(tmp, "w") as f:
+        f.write(name)
+
+    # keep the generation just replaced: a worker may have read CURRENT
+    # before the swap and still be opening it. Older ones are only held as
+    # open mappings, which survive the unlink.
+    for entry in os.listdir(path):
+        if entry.startswith(GENERATION_PREFIX) and entry not in (name, previous):
+            shutil.rmtree(os.path.join(path, entry), ignore_errors=True)
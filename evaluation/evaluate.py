@@ -6,14 +6,19 @@ Run with API server active: uvicorn app.main:app --reload
 
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
 
 import requests
+from requests.adapters import HTTPAdapter
 
-URL = "http://127.0.0.1:8000/ask"
+BATCH_URL = "http://127.0.0.1:8000/ask_batch"
 REFUSAL = "This information is not available in the provided document(s)."
 QUESTIONS_PATH = Path(__file__).parent / "questions.json"
 RESULTS_PATH = Path(__file__).parent / "evaluation_results.json"
+BATCH_SIZE = 4
+MAX_WORKERS = 16
 
 
 def normalize(text):
@@ -21,9 +26,19 @@ def normalize(text):
     return re.sub(r"\s+", " ", text.lower().strip())
 
 
+TOKEN_RE = re.compile(r"\b\w+\b")
+
+
+@lru_cache(maxsize=None)
 def tokenize(text):
-    """Simple word tokenization."""
-    return set(re.findall(r"\b\w+\b", normalize(text)))
+    """Simple word tokenization. Cached: the same chunks come back for many
+    questions, and each text only needs tokenizing once."""
+    return frozenset(TOKEN_RE.findall(normalize(text)))
+
+
+def tokenize_chunks(chunks):
+    """Union of the token sets of all chunks."""
+    return frozenset().union(*(tokenize(c.get("text", "")) for c in chunks))
 
 
 def overlap_score(answer_tokens, chunk_tokens):
@@ -40,11 +55,7 @@ def retrieval_hit(answer, chunks):
         return False
     if answer.strip() == REFUSAL.strip():
         return False
-    ans_tok = tokenize(answer)
-    chunk_tok = set()
-    for c in chunks:
-        chunk_tok |= tokenize(c.get("text", ""))
-    return overlap_score(ans_tok, chunk_tok) >= 0.15
+    return overlap_score(tokenize(answer), tokenize_chunks(chunks)) >= 0.15
 
 
 def faithfulness(answer, chunks):
@@ -53,11 +64,7 @@ def faithfulness(answer, chunks):
         return 1.0
     if not chunks:
         return 0.0
-    ans_tok = tokenize(answer)
-    chunk_tok = set()
-    for c in chunks:
-        chunk_tok |= tokenize(c.get("text", ""))
-    return overlap_score(ans_tok, chunk_tok)
+    return overlap_score(tokenize(answer), tokenize_chunks(chunks))
 
 
 def is_hallucination(answer, chunks):
@@ -67,49 +74,71 @@ def is_hallucination(answer, chunks):
     return faithfulness(answer, chunks) < 0.25
 
 
-def run_evaluation():
-    questions = json.loads(QUESTIONS_PATH.read_text(encoding="utf-8"))
-    results = []
-
-    for i, q in enumerate(questions):
-        qtext = q["question"]
-        qtype = q.get("type", "factual")
-        try:
-            r = requests.post(URL, json={"question": qtext, "debug": True}, timeout=60)
-            data = r.json()
-        except Exception as e:
-            results.append({
-                "question": qtext,
-                "type": qtype,
-                "answer": "",
-                "citations": [],
-                "chunks": [],
-                "error": str(e),
-                "retrieval_hit": False,
-                "faithfulness": 0.0,
-                "hallucination": True,
-            })
-            continue
-
-        answer = data.get("answer", "")
-        chunks = data.get("chunks", [])
-        citations = data.get("citations", [])
-
-        hit = retrieval_hit(answer, chunks)
-        faith = faithfulness(answer, chunks)
-        hall = is_hallucination(answer, chunks)
-
-        results.append({
+def post_batch(session, batch):
+    """POST a slice of questions to /ask_batch; on failure every question in
+    the slice gets the error."""
+    try:
+        r = session.post(
+            BATCH_URL,
+            json=[{"question": q["question"], "type": q.get("type"), "debug": True} for q in batch],
+            timeout=60 * len(batch),
+        )
+        r.raise_for_status()
+        return r.json()
+    except Exception as e:
+        return [{"error": str(e)}] * len(batch)
+
+
+def score(q, data):
+    qtext = q["question"]
+    qtype = q.get("type", "factual")
+    if "error" in data:
+        return {
             "question": qtext,
             "type": qtype,
-            "answer": answer,
-            "citations": citations,
-            "chunks": chunks,
-            "retrieval_hit": hit,
-            "faithfulness": faith,
-            "hallucination": hall,
-        })
-        print(f"  [{i+1}/{len(questions)}] {qtype}: {qtext[:50]}... -> hit={hit}, faith={faith:.2f}, hall={hall}")
+            "answer": "",
+            "citations": [],
+            "chunks": [],
+            "error": data["error"],
+            "retrieval_hit": False,
+            "faithfulness": 0.0,
+            "hallucination": True,
+        }
+
+    answer = data.get("answer", "")
+    chunks = data.get("chunks", [])
+    citations = data.get("citations", [])
+
+    return {
+        "question": qtext,
+        "type": qtype,
+        "answer": answer,
+        "citations": citations,
+        "chunks": chunks,
+        "retrieval_hit": retrieval_hit(answer, chunks),
+        "faithfulness": faithfulness(answer, chunks),
+        "hallucination": is_hallucination(answer, chunks),
+    }
+
+
+def run_evaluation():
+    questions = json.loads(QUESTIONS_PATH.read_text(encoding="utf-8"))
+    results = [None] * len(questions)
+
+    # Small batches keep several /ask_batch calls (and their LLM round-trips)
+    # in flight at once, over one pooled session.
+    starts = range(0, len(questions), BATCH_SIZE)
+    done = 0
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        session.mount("http://", HTTPAdapter(pool_maxsize=MAX_WORKERS))
+        futures = {ex.submit(post_batch, session, questions[s:s + BATCH_SIZE]): s for s in starts}
+        for f in as_completed(futures):
+            start = futures[f]
+            for j, data in enumerate(f.result()):
+                r = results[start + j] = score(questions[start + j], data)
+                done += 1
+                print(f"  [{done}/{len(questions)}] {r['type']}: {r['question'][:50]}... -> "
+                      f"hit={r['retrieval_hit']}, faith={r['faithfulness']:.2f}, hall={r['hallucination']}")
 
     # Save results
     RESULTS_PATH.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")